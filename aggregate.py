@@ -0,0 +1,21 @@
+# aggregate.py
+# Toplu (ilçe / ağ) tahmin sonuçlarını toplamak için saf yardımcılar.
+# Streamlit'e bağımlı değil: app.py dışında da import edilip test edilebilir.
+import numpy as np
+import pandas as pd
+
+
+def aggregate_by_district(keys: pd.DataFrame, y: np.ndarray) -> pd.DataFrame:
+    # district_norm × date toplamları: tamsayı kodlar + tek bincount
+    d_codes, d_uniq = pd.factorize(keys["district_norm"], sort=True)
+    t_codes, t_uniq = pd.factorize(keys["date"], sort=True)
+    n_d, n_t = len(d_uniq), len(t_uniq)
+    sums = np.bincount(
+        d_codes * n_t + t_codes,
+        weights=np.asarray(y, dtype=float),
+        minlength=n_d * n_t,
+    )
+    table = pd.DataFrame(sums.reshape(n_d, n_t), index=d_uniq, columns=t_uniq)
+    table.index.name = "district_norm"
+    table.columns.name = "date"
+    return table
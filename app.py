@@ -1,15 +1,26 @@
 # app.py
 import os
 import re
+import time
 import unicodedata
 from datetime import date as dt_date
 
+import altair as alt
 import streamlit as st
 import joblib
 import numpy as np
 import pandas as pd
 import holidays
 
+from aggregate import aggregate_by_district
+from drift import DRIFT_MIN_ROWS, DRIFT_PSI_ALERT, DRIFT_PSI_WARN, DriftMonitor
+from explain import (
+    METHOD_SAABAS, METHOD_TREESHAP, ExplanationCache, explain_batch, explain_blend, forest_path_matrix,
+    rf_method, shap, split_pipeline,
+)
+from history_store import HistoryStore, history_feature_names
+from prediction_log import PredictionLogWriter
+
 
 # =========================
 # KONFİG
@@ -576,6 +587,8 @@ bundle = load_bundle(BUNDLE_PATH)
 rf_pipe = bundle.get("rf_pipe")
 cat_pipe = bundle.get("cat_pipe")
 alpha = float(bundle.get("alpha", DEFAULT_ALPHA))
+# log/önbellek anahtarı: bundle kendi versiyonunu taşımıyorsa dosya mtime+boyut
+bundle_version = str(bundle.get("version") or f"{int(os.path.getmtime(BUNDLE_PATH))}-{os.path.getsize(BUNDLE_PATH)}")
 
 if rf_pipe is None or cat_pipe is None:
     st.error("❌ Bundle içinde `rf_pipe` veya `cat_pipe` yok. Bundle yapısını kontrol et.")
@@ -584,6 +597,64 @@ if rf_pipe is None or cat_pipe is None:
 st.caption(f"Ağırlıklar: **{alpha:.2f} RF** + **{1-alpha:.2f} CatBoost**")
 
 
+# =========================
+# 3b) TAHMİN LOGU (arka planda, kolonlu) -> prediction_log.py
+#    Okumak için: prediction_log.read_prediction_log(PRED_LOG_DIR)
+# =========================
+# Yük testi vb. için ortam değişkeniyle başka klasöre yönlendirilebilir / kapatılabilir
+PRED_LOG_DIR = os.environ.get("IBB_PRED_LOG_DIR", "prediction_logs")
+PRED_LOG_ENABLED = os.environ.get("IBB_PRED_LOG", "1") != "0"
+PRED_LOG_QUEUE_MAX = 1024    # kuyrukta bekleyebilecek batch sayısı
+PRED_LOG_FLUSH_ROWS = 5000   # bu kadar satır birikince yaz
+PRED_LOG_FLUSH_SEC = 5.0     # ya da bu kadar saniye geçince
+
+
+@st.cache_resource
+def prediction_log_writer():
+    # süreç başına tek yazıcı thread (tüm oturumlar paylaşır)
+    return PredictionLogWriter(PRED_LOG_DIR, PRED_LOG_QUEUE_MAX, PRED_LOG_FLUSH_ROWS, PRED_LOG_FLUSH_SEC)
+
+
+# =========================
+# 3c) GEÇMİŞ YOLCU VERİSİ (passage_cnt otomatik doldurma) -> history_store.py
+#    HISTORY_PATH: en az station_name, date, passage_cnt kolonlu Parquet.
+#    İstasyon kimliği = slugify_tr(station_name) (yazım farkları aynı satıra düşer).
+# =========================
+HISTORY_PATH = "passage_history.parquet"  # aynı klasörde (opsiyonel)
+HISTORY_FEATURES = history_feature_names()
+
+
+@st.cache_resource
+def load_history(path: str):
+    if not os.path.exists(path):
+        return None
+    df = pd.read_parquet(path, columns=["station_name", "date", "passage_cnt"])
+    return HistoryStore(df, station_key=slugify_tr)
+
+
+history_store = load_history(HISTORY_PATH)
+
+
+# =========================
+# 3d) GİRDİ KAYMASI (drift) İZLEME -> drift.py
+#    Bundle içindeki "reference_profile" ile canlı girdiler karşılaştırılır.
+#    Profil eklemek için: python drift.py --bundle bundle_rf_catboost.joblib --train egitim.parquet
+#    Toplu ilçe tahmini (istasyon × gün ızgarası) tek isteklerin dağılımını bozmasın
+#    diye ayrı bir "batch" monitörüne gider; ikisi kenar çubuğunda ayrı gösterilir.
+# =========================
+DRIFT_BATCH_SOURCES = {"aggregate"}
+
+
+@st.cache_resource
+def load_drift_monitor(version: str, kind: str, _profile):
+    # bundle + tür başına tek monitör (tüm oturumlar paylaşır); profil yoksa izleme kapalı
+    return DriftMonitor(_profile) if _profile else None
+
+
+drift_monitor = load_drift_monitor(bundle_version, "request", bundle.get("reference_profile"))
+batch_drift_monitor = load_drift_monitor(bundle_version, "batch", bundle.get("reference_profile"))
+
+
 # =========================
 # 4) INPUT UI (kullanıcıdan istenen az şey)
 # =========================
@@ -597,7 +668,13 @@ with st.sidebar:
     rain_mm = st.number_input("Yağış (mm) • rain_mm", value=0.0, step=0.1)
     tmax_c = st.number_input("Maks. Sıcaklık (°C) • tmax_c", value=20.0, step=0.1)
     tmin_c = st.number_input("Min. Sıcaklık (°C) • tmin_c", value=10.0, step=0.1)
-    passage_cnt = st.number_input("passage_cnt", value=0.0, step=1.0)
+    # geçmiş veri varsa passage_cnt (istasyon, tarih) için otomatik doldurulur
+    # (geçmişte kayıt yoksa elle girilen değer kullanılır)
+    passage_auto = history_store is not None and st.checkbox("passage_cnt geçmişten doldur", value=True)
+    passage_fallback = st.number_input(
+        "passage_cnt (geçmişte yoksa)" if passage_auto else "passage_cnt", value=0.0, step=1.0
+    )
+    passage_cnt = None if passage_auto else passage_fallback
 
 station_name, district_name = LABEL_TO_PAIR[choice]
 district_norm = slugify_tr(district_name)
@@ -626,74 +703,140 @@ def infer_required_columns(pipe):
     return []
 
 
-def build_X():
-    date_str = d.strftime("%Y-%m-%d")
+CAL_COLS = [
+    "year", "month", "day", "weekday_num", "weekofyear", "quarter",
+    "is_weekday", "is_weekend", "is_holiday", "is_official_holiday", "is_school_day",
+    "Hafta Sonu", "Tatiller", "Okul Günleri",
+]
+
+
+def build_X_batch(pairs, dates, weather: dict) -> pd.DataFrame:
+    # İstasyon × tarih çapraz çarpımı -> tek DataFrame (satır sırası: istasyon, sonra tarih).
+    # weather değerleri skaler ya da satır sayısı uzunluğunda dizi olabilir.
+    n_s, n_d = len(pairs), len(dates)
+    s_idx = np.repeat(np.arange(n_s), n_d)
+    d_idx = np.tile(np.arange(n_d), n_s)
+    return build_X_indexed(pairs, dates, s_idx, d_idx, weather)
+
+
+def build_X_rows(pairs, dates, weather: dict) -> pd.DataFrame:
+    # Satır satır (pairs[i], dates[i]) -> DataFrame. API / batch istemcileri için;
+    # tekrarlayan istasyon ve tarihler bir kez işlenir.
+    s_idx, s_uniq = pd.factorize(pd.Series(list(pairs), dtype=object))
+    d_idx, d_uniq = pd.factorize(pd.Series(list(dates), dtype=object))
+    return build_X_indexed(list(s_uniq), list(d_uniq), s_idx, d_idx, weather)
+
+
+def build_X_indexed(pairs, dates, s_idx, d_idx, weather: dict) -> pd.DataFrame:
+    # Ortak çekirdek: satır i = (pairs[s_idx[i]], dates[d_idx[i]])
+    n = len(s_idx)
+
+    stations = np.array([s for s, _ in pairs], dtype=object)
+    districts = np.array([dd for _, dd in pairs], dtype=object)
+    districts_norm = np.array([slugify_tr(dd) for _, dd in pairs], dtype=object)
+    date_strs = np.array([x.strftime("%Y-%m-%d") for x in dates], dtype=object)
+
+    # takvim her benzersiz tarih için bir kez hesaplanır, satırlara index ile dağıtılır
+    cal_df = pd.DataFrame([compute_calendar_features(x) for x in dates], columns=CAL_COLS)
+    cal_arr = {c: cal_df[c].to_numpy(dtype=np.int64)[d_idx] for c in CAL_COLS}
+
+    def wcol(key):
+        return np.broadcast_to(np.asarray(weather[key], dtype=float), (n,)).copy()
+
+    sunshine_hours_v = wcol("sunshine_hours")
+    rain_mm_v = wcol("rain_mm")
+    tmax_c_v = wcol("tmax_c")
+    tmin_c_v = wcol("tmin_c")
+
+    # geçmiş veri kodları: benzersiz istasyon / tarih başına bir kez, satırlara index ile
+    if history_store is not None:
+        hs = history_store.station_codes(stations)[s_idx]
+        ht = history_store.day_codes(dates)[d_idx]
+
+    # passage_cnt=None -> geçmiş veriden; bulunamayan satırlar weather["passage_cnt_fallback"]
+    # (verilmezse nötr 0.0). Düşen satır sayısı X.attrs["passage_cnt_fallback_rows"]
+    n_fallback = 0
+    if weather.get("passage_cnt") is None:
+        passage_v = np.full(n, np.nan)
+        if history_store is not None:
+            passage_v = history_store.take(hs, ht)
+        missing = np.isnan(passage_v)
+        n_fallback = int(missing.sum())
+        passage_v[missing] = float(weather.get("passage_cnt_fallback", 0.0))
+    else:
+        passage_v = wcol("passage_cnt")
 
     # Kullanıcıdan gelen minimal hava -> türetmeler
-    tmean_c = (float(tmax_c) + float(tmin_c)) / 2.0
-    sunshine_sec = float(sunshine_hours) * 3600.0
+    tmean_c_v = (tmax_c_v + tmin_c_v) / 2.0
+    sunshine_sec_v = sunshine_hours_v * 3600.0
 
     # “Model isterse lazım olur” diye otomatik doldurduklarımız
     base = {
-        "station_name": station_name,
-        "district_name": district_name,
-        "district_norm": district_norm,
-        "date": date_str,
+        "station_name": stations[s_idx],
+        "district_name": districts[s_idx],
+        "district_norm": districts_norm[s_idx],
+        "date": date_strs[d_idx],
 
-        "passage_cnt": float(passage_cnt),
+        "passage_cnt": passage_v,
 
         # kullanıcıdan
-        "sunshine_hours": float(sunshine_hours),
-        "rain_mm": float(rain_mm),
-        "tmax_c": float(tmax_c),
-        "tmin_c": float(tmin_c),
+        "sunshine_hours": sunshine_hours_v,
+        "rain_mm": rain_mm_v,
+        "tmax_c": tmax_c_v,
+        "tmin_c": tmin_c_v,
 
         # türetilen
-        "tmean_c": float(tmean_c),
-        "sunshine_sec": float(sunshine_sec),
+        "tmean_c": tmean_c_v,
+        "sunshine_sec": sunshine_sec_v,
 
         # genelde rain ile aynı tutulur
-        "precip_mm": float(rain_mm),
+        "precip_mm": rain_mm_v.copy(),
 
         # hissedilen sıcaklıkları basit eşle (API yoksa en makul yaklaşım)
-        "tapp_max_c": float(tmax_c),
-        "tapp_min_c": float(tmin_c),
-        "tapp_mean_c": float(tmean_c),
+        "tapp_max_c": tmax_c_v.copy(),
+        "tapp_min_c": tmin_c_v.copy(),
+        "tapp_mean_c": tmean_c_v.copy(),
 
         # kar vb yoksa 0
-        "snowfall_cm": 0.0,
-        "snow_depth_cm": 0.0,
-        "et0_mm": 0.0,
+        "snowfall_cm": np.zeros(n),
+        "snow_depth_cm": np.zeros(n),
+        "et0_mm": np.zeros(n),
 
         # sabit varsayımlar (istersen sonra gerçek API ile doldururuz)
-        "wind10m_mean_kmh": 10.0,
-        "cloud_cover_mean_pct": 50.0,
+        "wind10m_mean_kmh": np.full(n, 10.0),
+        "cloud_cover_mean_pct": np.full(n, 50.0),
 
         # takvim
-        "year": int(cal["year"]),
-        "month": int(cal["month"]),
-        "day": int(cal["day"]),
-        "weekday_num": int(cal["weekday_num"]),
-        "weekofyear": int(cal["weekofyear"]),
-        "quarter": int(cal["quarter"]),
-        "is_weekday": int(cal["is_weekday"]),
-        "is_weekend": int(cal["is_weekend"]),
-        "is_holiday": int(cal["is_holiday"]),
-        "is_official_holiday": int(cal["is_official_holiday"]),
-        "is_school_day": int(cal["is_school_day"]),
-        "Hafta Sonu": int(cal["Hafta Sonu"]),
-        "Tatiller": int(cal["Tatiller"]),
-        "Okul Günleri": int(cal["Okul Günleri"]),
+        **cal_arr,
 
         # veri setinde varsa diye
-        "is_outlier": False,
-        "is_extreme_day": 0,
+        "is_outlier": np.zeros(n, dtype=bool),
+        "is_extreme_day": np.zeros(n, dtype=np.int64),
 
         # opsiyonel bayrak
-        "is_religious_holiday": 0,
+        "is_religious_holiday": np.zeros(n, dtype=np.int64),
     }
 
-    return pd.DataFrame([base])
+    # geçmiş veri varsa gecikme / kayan ortalama kolonları (model istemezse ensure_required_cols atar)
+    if history_store is not None:
+        base.update(history_store.lag_features(hs, ht))
+
+    X = pd.DataFrame(base)
+    X.attrs["passage_cnt_fallback_rows"] = n_fallback
+    return X
+
+
+def build_X():
+    # Tek istasyon / tek gün = 1 satırlık batch
+    weather = {
+        "sunshine_hours": sunshine_hours,
+        "rain_mm": rain_mm,
+        "tmax_c": tmax_c,
+        "tmin_c": tmin_c,
+        "passage_cnt": passage_cnt,
+        "passage_cnt_fallback": passage_fallback,
+    }
+    return build_X_batch([(station_name, district_name)], [d], weather)
 
 
 def ensure_required_cols(X: pd.DataFrame, required_cols: list[str]) -> pd.DataFrame:
@@ -708,6 +851,7 @@ def ensure_required_cols(X: pd.DataFrame, required_cols: list[str]) -> pd.DataFr
         "wind10m_mean_kmh": 10.0, "cloud_cover_mean_pct": 50.0,
         "sunshine_sec": 0.0, "sunshine_hours": 0.0,
         "passage_cnt": 0.0,
+        **{c: 0.0 for c in HISTORY_FEATURES},
         "year": 0, "month": 0, "day": 0, "weekday_num": 0, "weekofyear": 0, "quarter": 0,
         "Hafta Sonu": 0, "Tatiller": 0, "Okul Günleri": 0,
         "is_weekday": 0, "is_weekend": 0, "is_holiday": 0, "is_school_day": 0,
@@ -732,9 +876,101 @@ def ensure_required_cols(X: pd.DataFrame, required_cols: list[str]) -> pd.DataFr
     return X[required_cols]
 
 
+def predict_blend(X_model: pd.DataFrame, X_inputs: pd.DataFrame | None = None, source: str = "single",
+                  log: bool = True):
+    # Tek batch çağrısı: her satır için RF, CatBoost ve harmanlanmış tahmin
+    t0 = time.perf_counter()
+    y_rf = np.asarray(rf_pipe.predict(X_model)).reshape(-1)
+    y_cat = np.asarray(cat_pipe.predict(X_model)).reshape(-1)
+    y = alpha * y_rf + (1 - alpha) * y_cat
+    elapsed_ms = (time.perf_counter() - t0) * 1000.0
+
+    # build_X girdileri + parçalar log kuyruğuna (yazma arka planda)
+    if log and PRED_LOG_ENABLED:
+        log_df = (X_inputs if X_inputs is not None else X_model).reset_index(drop=True).assign(
+            logged_at=pd.Timestamp.now(),
+            source=source,
+            bundle_version=bundle_version,
+            alpha=float(alpha),
+            y_rf=y_rf,
+            y_cat=y_cat,
+            y=y,
+            batch_rows=len(y),
+            latency_ms=elapsed_ms,
+        )
+        prediction_log_writer().submit(log_df)
+    monitor = batch_drift_monitor if source in DRIFT_BATCH_SOURCES else drift_monitor
+    if monitor is not None:
+        monitor.observe(X_inputs if X_inputs is not None else X_model)
+    return y_rf, y_cat, y
+
+
+# =========================
+# 5b) TOPLU (İLÇE / AĞ) TAHMİN
+# =========================
+MAX_AGG_DAYS = 31
+
+
+def unique_station_pairs(pairs):
+    # Aynı istasyonun farklı yazımları (AKSARAY / Aksaray) toplamı iki kez saymasın:
+    # (slug(istasyon), ilçe) başına ilk kaydı tut
+    out = []
+    seen = set()
+    for s, dd in pairs:
+        key = (slugify_tr(s), dd)
+        if key not in seen:
+            seen.add(key)
+            out.append((s, dd))
+    return out
+
+
+AGG_PAIRS = unique_station_pairs(STATION_DISTRICT_PAIRS)
+DISTRICT_NORM_OPTIONS = sorted({slugify_tr(dd) for _, dd in AGG_PAIRS})
+
+
+# =========================
+# 5c) AÇIKLAMA (özellik katkıları) -> explain.py
+#    RF için TreeSHAP (shap, requirements.txt). shap yoksa Saabas sadece
+#    IBB_EXPLAIN_SAABAS=1 ile açılır ve arayüzde etiketlenir.
+#    Satır bazlı önbellek: (bundle_version, yöntem, satır hash'i).
+# =========================
+EXPLAIN_CACHE_ROWS = 50_000
+EXPLAIN_RF_METHOD = rf_method(allow_saabas=os.environ.get("IBB_EXPLAIN_SAABAS", "0") == "1")
+
+
+@st.cache_resource
+def rf_explain_helpers(version: str, method: str):
+    # yönteme göre önceden hazırlanan nesne (TreeExplainer ya da Saabas yol matrisi)
+    _, est = split_pipeline(rf_pipe)
+    if method == METHOD_TREESHAP:
+        return {"explainer": shap.TreeExplainer(est)}
+    if method == METHOD_SAABAS:
+        return {"path_matrix": forest_path_matrix(est, est.n_features_in_)}
+    return {}
+
+
+def explain_uncached(X_model: pd.DataFrame):
+    helpers = rf_explain_helpers(bundle_version, EXPLAIN_RF_METHOD)
+    return explain_blend(rf_pipe, cat_pipe, alpha, X_model, EXPLAIN_RF_METHOD, **helpers)
+
+
+@st.cache_resource
+def explanation_cache():
+    return ExplanationCache(EXPLAIN_CACHE_ROWS)
+
+
+def explain_rows(X_model: pd.DataFrame):
+    # -> (base Series, katkı DataFrame); önbellek anahtarı bundle sürümü + yöntem
+    return explain_batch(X_model, explanation_cache(), (bundle_version, EXPLAIN_RF_METHOD), explain_uncached)
+
+
 # =========================
 # 6) EKRAN / TAHMİN
 # =========================
+X = build_X()
+passage_used = float(X["passage_cnt"].iloc[0])
+passage_missing = X.attrs.get("passage_cnt_fallback_rows", 0) > 0
+
 colA, colB = st.columns([1, 1])
 
 with colA:
@@ -755,9 +991,15 @@ with colB:
     st.write("**rain_mm:**", rain_mm)
     st.write("**tmax_c:**", tmax_c)
     st.write("**tmin_c:**", tmin_c)
-    st.write("**passage_cnt:**", passage_cnt)
-
-X = build_X()
+    if passage_cnt is None and not passage_missing:
+        st.write("**passage_cnt:**", passage_used, "(geçmişten)")
+    else:
+        st.write("**passage_cnt:**", passage_used)
+    if passage_cnt is None and passage_missing:
+        st.warning(
+            f"⚠️ {station_name} / {d:%Y-%m-%d} için geçmiş kaydı yok; "
+            f"elle girilen passage_cnt = {passage_used} kullanıldı."
+        )
 
 # Modelin beklediği kolonları bulabiliyorsak ona göre eksikleri tamamla
 req_rf = infer_required_columns(rf_pipe)
@@ -769,11 +1011,18 @@ X_model = ensure_required_cols(X.copy(), req_union) if req_union else X
 with st.expander("🔎 Modele giden X (debug)", expanded=False):
     st.dataframe(X_model, use_container_width=True)
 
+    if PRED_LOG_ENABLED:
+        log_stats = prediction_log_writer().stats()
+        st.caption(
+            f"Tahmin logu: {log_stats['written']} satır yazıldı • {log_stats['queued']} batch kuyrukta • "
+            f"{log_stats['dropped']} satır düşürüldü • {log_stats['errors']} yazma hatası"
+        )
+    else:
+        st.caption("Tahmin logu kapalı (IBB_PRED_LOG=0).")
+
 if st.button("🚀 Tahmin Et", use_container_width=True):
     try:
-        y_rf = np.asarray(rf_pipe.predict(X_model)).reshape(-1)
-        y_cat = np.asarray(cat_pipe.predict(X_model)).reshape(-1)
-        y = alpha * y_rf + (1 - alpha) * y_cat
+        y_rf, y_cat, y = predict_blend(X_model, X_inputs=X)
 
         st.success(f"✅ Tahmin (target_day): **{float(y[0]):.4f}**")
 
@@ -782,6 +1031,159 @@ if st.button("🚀 Tahmin Et", use_container_width=True):
             st.write("CatBoost:", float(y_cat[0]))
             st.write("Alpha:", float(alpha))
 
+        with st.expander("🧩 Neden bu tahmin? (özellik katkıları)", expanded=False):
+            if EXPLAIN_RF_METHOD is None:
+                st.warning("RF açıklaması için `shap` kurulu değil (requirements.txt).")
+            else:
+                try:
+                    base_e, contrib_e = explain_rows(X_model)
+                    row = contrib_e.iloc[0]
+                    top = row[row.abs().sort_values(ascending=False).index[:10]]
+                    st.caption(f"Yöntem: RF = **{EXPLAIN_RF_METHOD}**, CatBoost = **SHAP (yerel)**, alpha ile harmanlı")
+                    if EXPLAIN_RF_METHOD == METHOD_SAABAS:
+                        st.warning("⚠️ RF katkıları Saabas yaklaşımıdır (SHAP değil); CatBoost SHAP ile karıştırılmıştır.")
+                    st.write("Taban değer:", float(base_e.iloc[0]))
+                    st.bar_chart(top.rename("katkı"), horizontal=True)
+                except Exception as e:
+                    st.warning(f"Katkılar hesaplanamadı: {e}")
+
     except Exception as e:
         st.error("❌ Tahmin sırasında hata oluştu.")
         st.exception(e)
+
+
+# =========================
+# 7) İLÇE / AĞ TOPLAM TAHMİNİ
+#    Seçilen kapsamın tüm istasyonları × tarih aralığı tek batch'te tahmin edilir,
+#    sonra district_norm × date tablosuna toplanır.
+#    Hava girdileri kenar çubuğundakilerle aynı kabul edilir.
+# =========================
+st.divider()
+st.subheader("🗺️ İlçe / Ağ Toplam Tahmini")
+
+agg_scope = st.radio("Kapsam", ["Tek ilçe", "Tüm ağ"], horizontal=True)
+agg_district = None
+if agg_scope == "Tek ilçe":
+    agg_district = st.selectbox(
+        "İlçe (district_norm)",
+        options=DISTRICT_NORM_OPTIONS,
+        index=DISTRICT_NORM_OPTIONS.index(district_norm) if district_norm in DISTRICT_NORM_OPTIONS else 0,
+    )
+
+c1, c2 = st.columns(2)
+agg_start = c1.date_input("Başlangıç", value=d, key="agg_start")
+agg_end = c2.date_input("Bitiş", value=d, key="agg_end")
+
+# geçmiş veri yoksa istasyon başı passage_cnt bilinmez: nötr 0.0 ile çalıştırmak
+# kullanıcının açık tercihi olmalı (sonuç da öyle etiketlenir)
+agg_allow_neutral = False
+if history_store is None:
+    st.warning(
+        f"⚠️ `{HISTORY_PATH}` yok: istasyon başı passage_cnt bilinmiyor. "
+        "Toplamlar ancak tüm istasyonlar passage_cnt = 0.0 kabul edilerek hesaplanabilir."
+    )
+    agg_allow_neutral = st.checkbox("passage_cnt = 0.0 (nötr varsayılan) ile yine de hesapla", value=False)
+
+if st.button(
+    "📊 Toplam Tahmin",
+    use_container_width=True,
+    disabled=history_store is None and not agg_allow_neutral,
+):
+    agg_dates = list(pd.date_range(agg_start, agg_end, freq="D").date)
+    if not agg_dates:
+        st.error("❌ Bitiş tarihi başlangıçtan önce olamaz.")
+    elif len(agg_dates) > MAX_AGG_DAYS:
+        st.error(f"❌ En fazla {MAX_AGG_DAYS} gün seçilebilir.")
+    else:
+        agg_pairs = [
+            (s, dd) for s, dd in AGG_PAIRS
+            if agg_district is None or slugify_tr(dd) == agg_district
+        ]
+        # passage_cnt istasyon başınadır: kenar çubuğundaki tek değer diğer istasyonlara
+        # kopyalanmaz. None -> geçmiş veri varsa (istasyon, gün) değeri, yoksa nötr 0.0
+        weather = {
+            "sunshine_hours": sunshine_hours,
+            "rain_mm": rain_mm,
+            "tmax_c": tmax_c,
+            "tmin_c": tmin_c,
+            "passage_cnt": None,
+        }
+        try:
+            X_agg = build_X_batch(agg_pairs, agg_dates, weather)
+            X_agg_model = ensure_required_cols(X_agg.copy(), req_union) if req_union else X_agg
+            _, _, y_agg = predict_blend(X_agg_model, X_inputs=X_agg, source="aggregate")
+            st.session_state["agg_table"] = aggregate_by_district(X_agg, y_agg)
+            st.session_state["agg_n_rows"] = len(X_agg)
+            st.session_state["agg_fallback_rows"] = X_agg.attrs.get("passage_cnt_fallback_rows", 0)
+            st.session_state["agg_passage_src"] = (
+                "geçmiş veri (istasyon × gün)" if history_store is not None
+                else "nötr varsayılan 0.0 (kullanıcı tercihi; geçmiş veri yok)"
+            )
+        except Exception as e:
+            st.error("❌ Toplu tahmin sırasında hata oluştu.")
+            st.exception(e)
+
+agg_table = st.session_state.get("agg_table")
+if agg_table is not None:
+    agg_n_rows = st.session_state.get("agg_n_rows", 0)
+    agg_fb = st.session_state.get("agg_fallback_rows", 0)
+    st.caption(
+        f"{agg_n_rows} satır (istasyon × gün) tahmin edildi. "
+        f"passage_cnt kaynağı: {st.session_state.get('agg_passage_src', '—')}."
+    )
+    if agg_fb > 0:
+        st.warning(
+            f"⚠️ {agg_fb} / {agg_n_rows} satırda geçmiş passage_cnt yok; bu satırlar 0.0 ile tahmin edildi. "
+            "Toplamlar bu satırlar için yolcu sayısı bilgisi içermez."
+        )
+
+    agg_view = agg_table.copy()
+    agg_view["Toplam"] = agg_view.sum(axis=1)
+    st.dataframe(agg_view, use_container_width=True)
+
+    agg_long = agg_table.stack().rename("y").reset_index()
+    heatmap = (
+        alt.Chart(agg_long)
+        .mark_rect()
+        .encode(
+            x=alt.X("date:O", title="Tarih"),
+            y=alt.Y("district_norm:N", title="İlçe"),
+            color=alt.Color("y:Q", title="Tahmin"),
+            tooltip=["district_norm", "date", alt.Tooltip("y:Q", format=",.0f")],
+        )
+    )
+    st.altair_chart(heatmap, use_container_width=True)
+
+
+# =========================
+# 8) GİRDİ KAYMASI METRİKLERİ
+# =========================
+def show_drift_metrics(monitor: DriftMonitor):
+    drift = monitor.metrics()
+    st.caption(f"İzlenen satır: {drift['n_rows']} (skor için en az {DRIFT_MIN_ROWS})")
+    for c, score in drift.items():
+        if c == "n_rows":
+            continue
+        if score is None:
+            st.metric(c, "—")
+        else:
+            status = "kayma" if score > DRIFT_PSI_ALERT else "dikkat" if score > DRIFT_PSI_WARN else "normal"
+            st.metric(c, f"{score:.3f}", status, delta_color="off")
+
+
+with st.sidebar:
+    with st.expander("📉 Girdi kayması (PSI)", expanded=False):
+        if drift_monitor is None:
+            st.caption("Bundle içinde `reference_profile` yok; izleme kapalı. Eklemek için: `python drift.py --bundle ... --train ...`")
+        else:
+            st.markdown("**Tek tahminler**")
+            show_drift_metrics(drift_monitor)
+            st.markdown("**Toplu tahmin (ızgara)**")
+            st.caption(
+                "İstasyon × gün ızgarası: istasyon/tarih dağılımı kurgu gereği düzgün, "
+                "anlamlı olan hava durumu kolonları."
+            )
+            show_drift_metrics(batch_drift_monitor)
+            if st.button("Sayaçları sıfırla"):
+                drift_monitor.reset()
+                batch_drift_monitor.reset()
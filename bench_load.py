@@ -0,0 +1,296 @@
+# bench_load.py
+# Yük testi: tahmin yolunu eşzamanlı kullanıcılarla sürer, throughput / gecikme yüzdelikleri
+# ve zaman içinde CPU / bellek raporlar.
+#
+#   python bench_load.py --mode headless --concurrency 8 --duration 60 --batch-size 1
+#   python bench_load.py --mode app --concurrency 4 --requests 200
+#
+# headless: app.py Streamlit runtime'ı olmadan (bare mode) bir kez import edilir,
+#           sonra build_X_rows + predict_blend doğrudan çağrılır (API istemcisi gibi).
+# app:      her istek Streamlit testing API (AppTest) ile script'i baştan çalıştırır,
+#           kenar çubuğu girdilerini doldurur ve "Tahmin Et" butonuna basar.
+#           Bir istek iki script çalıştırmasıdır: açılış (sayfa yükleme) ve butonlu
+#           yeniden çalıştırma (tahmin); ikisi ayrı ayrı da raporlanır.
+#
+# Tahmin logu üretim klasörüne (prediction_logs/) yazılmaz: varsayılan olarak geçici
+# bir klasöre yönlendirilir (IBB_PRED_LOG_DIR), --no-log ile tamamen kapatılır.
+# --passage-from-history: passage_cnt elle verilmez, geçmiş veri araması da ölçülür.
+import argparse
+import csv
+import logging
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date as dt_date, timedelta
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # opsiyonel: yoksa /proc + os.times ile ölçülür
+    psutil = None
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+PREDICT_BUTTON_LABEL = "🚀 Tahmin Et"
+
+
+# =========================
+# 1) GİRDİ KARIŞIMI
+# =========================
+def parse_date(s: str) -> dt_date:
+    return dt_date.fromisoformat(s)
+
+
+def random_inputs(rng: random.Random, labels, start: dt_date, end: dt_date) -> dict:
+    # İstanbul için kabaca makul hava: çoğu gün kuru, sıcaklık mevsime göre
+    d = start + timedelta(days=rng.randrange((end - start).days + 1))
+    seasonal = 15.0 - 9.0 * np.cos(2 * np.pi * (d.timetuple().tm_yday - 15) / 365.0)
+    tmax_c = round(rng.gauss(seasonal + 4.0, 4.0), 1)
+    tmin_c = round(tmax_c - rng.uniform(4.0, 10.0), 1)
+    rain_mm = 0.0 if rng.random() < 0.7 else round(rng.expovariate(1 / 6.0), 1)
+    return {
+        "date": d,
+        "label": rng.choice(labels),
+        "sunshine_hours": round(rng.uniform(0.0, 12.0), 1),
+        "rain_mm": rain_mm,
+        "tmax_c": tmax_c,
+        "tmin_c": tmin_c,
+        "passage_cnt": float(rng.randrange(0, 50_000)),
+    }
+
+
+# =========================
+# 2) HEDEFLER (headless / app)
+# =========================
+class HeadlessTarget:
+    def __init__(self, batch_size: int, passage_from_history: bool):
+        # bare mode'da Streamlit "ScriptRunContext yok" uyarıları basar; sustur
+        logging.getLogger("streamlit").setLevel(logging.ERROR)
+        import app  # noqa: E402  (script bir kez, runtime'sız çalışır)
+
+        self.app = app
+        self.batch_size = batch_size
+        self.passage_from_history = passage_from_history
+        self.labels = app.OPTION_LABELS
+
+    def request(self, rng, start, end):
+        rows = [random_inputs(rng, self.labels, start, end) for _ in range(self.batch_size)]
+        app = self.app
+        pairs = [app.LABEL_TO_PAIR[r["label"]] for r in rows]
+        dates = [r["date"] for r in rows]
+        weather = {k: np.array([r[k] for r in rows]) for k in
+                   ("sunshine_hours", "rain_mm", "tmax_c", "tmin_c", "passage_cnt")}
+        if self.passage_from_history:
+            weather["passage_cnt"] = None  # build_X_indexed geçmiş veriden arar
+
+        X = app.build_X_rows(pairs, dates, weather)
+        X_model = app.ensure_required_cols(X.copy(), app.req_union) if app.req_union else X
+        app.predict_blend(X_model, X_inputs=X, source="load_test")
+
+
+class AppTarget:
+    def __init__(self, timeout: float, passage_from_history: bool):
+        from streamlit.testing.v1 import AppTest
+
+        self.AppTest = AppTest
+        self.timeout = timeout
+        self.passage_from_history = passage_from_history
+        # etiket listesi için script'i bir kez çalıştır
+        at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+        self.labels = list(at.sidebar.selectbox[0].options)
+
+    def request(self, rng, start, end):
+        r = random_inputs(rng, self.labels, start, end)
+        t0 = time.perf_counter()
+        at = self.AppTest.from_file(APP_PATH, default_timeout=self.timeout).run()
+
+        sb = at.sidebar
+        if len(sb.checkbox):  # "geçmişten doldur" sadece geçmiş veri varsa görünür
+            sb.checkbox[0].set_value(self.passage_from_history)
+        sb.date_input[0].set_value(r["date"])
+        sb.selectbox[0].set_value(r["label"])
+        for w, key in zip(sb.number_input, ("sunshine_hours", "rain_mm", "tmax_c", "tmin_c", "passage_cnt")):
+            w.set_value(r[key])
+
+        t_load = time.perf_counter() - t0
+
+        btn = next(b for b in at.button if b.label == PREDICT_BUTTON_LABEL)
+        t1 = time.perf_counter()
+        btn.click().run()
+        t_click = time.perf_counter() - t1
+        if at.exception or at.error:
+            raise RuntimeError("; ".join(str(e.value) for e in list(at.exception) + list(at.error)))
+        return {"açılış": t_load, "tıklama": t_click}
+
+
+# =========================
+# 3) KAYNAK ÖRNEKLEYİCİ (CPU / bellek)
+# =========================
+def read_rss_bytes() -> int:
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # son çare: tepe RSS (Linux'ta KB)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class ResourceSampler(threading.Thread):
+    def __init__(self, interval: float, completed_fn):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.interval = interval
+        self.completed_fn = completed_fn
+        self.samples = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        t0 = time.perf_counter()
+        last_t, last_cpu, last_done = t0, sum(os.times()[:2]), 0
+        while not self._stop_event.wait(self.interval):
+            now = time.perf_counter()
+            cpu = sum(os.times()[:2])
+            done = self.completed_fn()
+            dt = now - last_t
+            self.samples.append({
+                "t_s": round(now - t0, 2),
+                "completed": done,
+                "rps": (done - last_done) / dt if dt > 0 else 0.0,
+                "cpu_pct": 100.0 * (cpu - last_cpu) / dt if dt > 0 else 0.0,  # >100 = çok çekirdek
+                "rss_mb": read_rss_bytes() / 2**20,
+            })
+            last_t, last_cpu, last_done = now, cpu, done
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+# =========================
+# 4) ÇALIŞTIRICI
+# =========================
+def run_load(target, concurrency: int, duration: float, n_requests: int | None,
+             start: dt_date, end: dt_date, sample_interval: float, seed: int):
+    lock = threading.Lock()
+    latencies, errors = [], []
+    phases = {}  # hedef aşama süreleri döndürürse (app: açılış / tıklama)
+    issued = [0]
+
+    def next_ticket():
+        with lock:
+            if n_requests is not None and issued[0] >= n_requests:
+                return False
+            issued[0] += 1
+            return True
+
+    def worker(i: int):
+        rng = random.Random(seed + i)
+        stop_at = time.perf_counter() + duration
+        while time.perf_counter() < stop_at and next_ticket():
+            t0 = time.perf_counter()
+            try:
+                phase_s = target.request(rng, start, end)
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            dt = time.perf_counter() - t0
+            with lock:
+                latencies.append(dt)
+                for name, v in (phase_s or {}).items():
+                    phases.setdefault(name, []).append(v)
+
+    sampler = ResourceSampler(sample_interval, lambda: len(latencies))
+    sampler.start()
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(worker, range(concurrency)))
+    wall = time.perf_counter() - t0
+    sampler.stop()
+
+    return {"latencies": np.asarray(latencies), "errors": errors, "wall_s": wall, "samples": sampler.samples,
+            "phases": {k: np.asarray(v) for k, v in phases.items()}}
+
+
+def print_latency(title: str, lat_ms: np.ndarray):
+    p50, p90, p95, p99 = np.percentile(lat_ms, [50, 90, 95, 99])
+    print(f"{title}: ort {lat_ms.mean():.1f} | p50 {p50:.1f} | p90 {p90:.1f} | "
+          f"p95 {p95:.1f} | p99 {p99:.1f} | max {lat_ms.max():.1f}")
+
+
+def print_report(res: dict, batch_size: int):
+    lat_ms = res["latencies"] * 1000.0
+    n_ok, n_err, wall = len(lat_ms), len(res["errors"]), res["wall_s"]
+    print(f"\nİstek: {n_ok} başarılı, {n_err} hata, süre {wall:.1f} s")
+    print(f"Throughput: {n_ok / wall:.2f} istek/s ({n_ok * batch_size / wall:.1f} satır/s)")
+    if n_ok:
+        print_latency("Gecikme (ms)", lat_ms)
+        for name, v in res.get("phases", {}).items():
+            print_latency(f"  {name} (ms)", v * 1000.0)
+    if res["samples"]:
+        cpu = [s["cpu_pct"] for s in res["samples"]]
+        rss = [s["rss_mb"] for s in res["samples"]]
+        print(f"CPU %: ort {np.mean(cpu):.0f} | max {np.max(cpu):.0f}    "
+              f"RSS MB: başlangıç {rss[0]:.0f} | max {np.max(rss):.0f} | son {rss[-1]:.0f}")
+        print("\n   t_s  completed     rps   cpu_pct   rss_mb")
+        for s in res["samples"]:
+            print(f"{s['t_s']:6.1f} {s['completed']:10d} {s['rps']:7.1f} {s['cpu_pct']:9.0f} {s['rss_mb']:8.0f}")
+    if n_err:
+        print("\nİlk hatalar:")
+        for e in res["errors"][:5]:
+            print("  ", e)
+
+
+def main():
+    p = argparse.ArgumentParser(description="İBB Raylı Sistem tahmin yolu için yük testi")
+    p.add_argument("--mode", choices=["headless", "app"], default="headless")
+    p.add_argument("--concurrency", type=int, default=4, help="eşzamanlı kullanıcı / istemci sayısı")
+    p.add_argument("--duration", type=float, default=30.0, help="en fazla bu kadar saniye")
+    p.add_argument("--requests", type=int, default=None, help="toplam istek sınırı (opsiyonel)")
+    p.add_argument("--batch-size", type=int, default=1, help="headless: istek başına satır")
+    p.add_argument("--start", type=parse_date, default=dt_date(2022, 9, 1))
+    p.add_argument("--end", type=parse_date, default=dt_date(2024, 12, 31))
+    p.add_argument("--sample-interval", type=float, default=1.0, help="CPU/bellek örnekleme (s)")
+    p.add_argument("--app-timeout", type=float, default=60.0, help="app: tek script çalıştırma zaman aşımı (s)")
+    p.add_argument("--seed", type=int, default=0)
+    p.add_argument("--csv", default=None, help="zaman serisi örneklerini bu CSV'ye yaz")
+    p.add_argument("--log-dir", default=None, help="tahmin logu klasörü (varsayılan: geçici klasör)")
+    p.add_argument("--no-log", action="store_true", help="tahmin logunu kapat")
+    p.add_argument("--passage-from-history", action="store_true",
+                   help="passage_cnt'yi geçmiş veriden doldur (passage_history.parquet gerekir)")
+    args = p.parse_args()
+
+    # app.py import edilmeden / AppTest başlamadan önce: üretim log'una dokunma
+    if args.no_log:
+        os.environ["IBB_PRED_LOG"] = "0"
+    else:
+        log_dir = args.log_dir or tempfile.mkdtemp(prefix="ibb_bench_load_logs_")
+        os.environ["IBB_PRED_LOG_DIR"] = log_dir
+        print(f"Tahmin logu: {log_dir}")
+
+    if args.mode == "headless":
+        target = HeadlessTarget(args.batch_size, args.passage_from_history)
+        batch_size = args.batch_size
+    else:
+        target = AppTarget(args.app_timeout, args.passage_from_history)
+        batch_size = 1
+
+    res = run_load(target, args.concurrency, args.duration, args.requests,
+                   args.start, args.end, args.sample_interval, args.seed)
+    print_report(res, batch_size)
+
+    if args.csv and res["samples"]:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=list(res["samples"][0]))
+            w.writeheader()
+            w.writerows(res["samples"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+# drift.py
+# Girdi kayması (drift) izleme: eğitim verisinden referans profil + canlı girdiler için
+# akan (streaming) taslaklar. Sayısal kolonlar: sabit kenarlı histogram, kategorik
+# kolonlar: değer sayımları. Her batch kolon başına tek searchsorted + bincount ile
+# eklenir; skor = PSI (kabaca >0.1 dikkat, >0.25 kayma).
+# Streamlit'e bağımlı değil. Mevcut bundle'a profil eklemek için:
+#
+#   python drift.py --bundle bundle_rf_catboost.joblib --train egitim.parquet
+import argparse
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DRIFT_PSI_WARN = 0.1
+DRIFT_PSI_ALERT = 0.25
+DRIFT_MIN_ROWS = 200   # bundan az satırla skor gösterme (gürültülü)
+DRIFT_EPS = 1e-4
+
+# app.py'nin kullanıcıdan aldığı / sabit doldurduğu kolonlar
+DEFAULT_NUMERIC_COLS = [
+    "sunshine_hours", "rain_mm", "tmax_c", "tmin_c", "passage_cnt",
+    "wind10m_mean_kmh", "cloud_cover_mean_pct",
+]
+DEFAULT_CATEGORICAL_COLS = ["station_name", "district_norm"]
+
+
+def build_reference_profile(X: pd.DataFrame, numeric_cols, categorical_cols, n_bins: int = 10) -> dict:
+    # Eğitim verisinden referans profil: bundle["reference_profile"] olarak saklanır
+    prof = {"numeric": {}, "categorical": {}}
+    for c in numeric_cols:
+        v = pd.to_numeric(X[c], errors="coerce").dropna().to_numpy(dtype=float)
+        edges = np.unique(np.quantile(v, np.linspace(0.0, 1.0, n_bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, v, side="right"), minlength=len(edges) + 1)
+        prof["numeric"][c] = {"edges": edges.tolist(), "counts": counts.tolist()}
+    for c in categorical_cols:
+        prof["categorical"][c] = {"counts": X[c].astype(str).value_counts().to_dict()}
+    return prof
+
+
+def psi(ref_counts, cur_counts) -> float:
+    p = np.asarray(ref_counts, dtype=float)
+    q = np.asarray(cur_counts, dtype=float)
+    p = np.clip(p / max(p.sum(), 1.0), DRIFT_EPS, None)
+    q = np.clip(q / max(q.sum(), 1.0), DRIFT_EPS, None)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+class DriftMonitor:
+    def __init__(self, profile: dict, min_rows: int = DRIFT_MIN_ROWS):
+        self.lock = threading.Lock()
+        self.min_rows = min_rows
+        self.numeric = {
+            c: (np.asarray(p["edges"], dtype=float), np.asarray(p["counts"], dtype=float))
+            for c, p in profile.get("numeric", {}).items()
+        }
+        self.categorical = {c: dict(p["counts"]) for c, p in profile.get("categorical", {}).items()}
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.n_rows = 0
+            self.num_counts = {c: np.zeros(len(edges) + 1, dtype=np.int64) for c, (edges, _) in self.numeric.items()}
+            self.cat_counts = {c: {} for c in self.categorical}
+
+    def observe(self, X: pd.DataFrame):
+        # Kilit dışında hesapla, kilit içinde sadece topla
+        num_upd = {}
+        for c, (edges, _) in self.numeric.items():
+            if c in X.columns:
+                v = pd.to_numeric(X[c], errors="coerce").to_numpy(dtype=float)
+                v = v[~np.isnan(v)]
+                num_upd[c] = np.bincount(np.searchsorted(edges, v, side="right"), minlength=len(edges) + 1)
+        cat_upd = {c: X[c].astype(str).value_counts().to_dict() for c in self.categorical if c in X.columns}
+
+        with self.lock:
+            self.n_rows += len(X)
+            for c, cnt in num_upd.items():
+                self.num_counts[c] += cnt
+            for c, vc in cat_upd.items():
+                cur = self.cat_counts[c]
+                for k, v in vc.items():
+                    cur[k] = cur.get(k, 0) + v
+
+    def metrics(self) -> dict:
+        # kolon -> PSI (yetersiz veride None)
+        with self.lock:
+            n = self.n_rows
+            num = {c: cnt.copy() for c, cnt in self.num_counts.items()}
+            cat = {c: dict(cnt) for c, cnt in self.cat_counts.items()}
+        out = {"n_rows": n}
+        for c, (_, ref) in self.numeric.items():
+            out[c] = psi(ref, num[c]) if n >= self.min_rows else None
+        for c, ref in self.categorical.items():
+            # referansta olmayan değerler kendi kovalarında (ref payı eps)
+            keys = list(dict.fromkeys(list(ref) + list(cat[c])))
+            out[c] = (
+                psi([ref.get(k, 0) for k in keys], [cat[c].get(k, 0) for k in keys])
+                if n >= self.min_rows else None
+            )
+        return out
+
+
+def load_training_frame(path: str) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def main():
+    import joblib
+
+    p = argparse.ArgumentParser(description="Bundle'a eğitim verisinden reference_profile ekler")
+    p.add_argument("--bundle", required=True, help="mevcut bundle (.joblib)")
+    p.add_argument("--train", required=True, help="eğitim verisi (.parquet ya da .csv)")
+    p.add_argument("--out", default=None, help="yazılacak bundle (varsayılan: --bundle üzerine)")
+    p.add_argument("--numeric", nargs="*", default=DEFAULT_NUMERIC_COLS)
+    p.add_argument("--categorical", nargs="*", default=DEFAULT_CATEGORICAL_COLS)
+    p.add_argument("--bins", type=int, default=10)
+    args = p.parse_args()
+
+    X = load_training_frame(args.train)
+    missing = [c for c in args.numeric + args.categorical if c not in X.columns]
+    if missing:
+        print(f"Eğitim verisinde olmayan kolonlar atlandı: {missing}")
+    numeric = [c for c in args.numeric if c in X.columns]
+    categorical = [c for c in args.categorical if c in X.columns]
+
+    bundle = joblib.load(args.bundle)
+    bundle["reference_profile"] = build_reference_profile(X, numeric, categorical, n_bins=args.bins)
+    out = args.out or args.bundle
+    # önce aynı klasörde gizli geçici dosyaya, sonra atomik taşı: yarıda kesilirse
+    # (disk dolu, Ctrl+C) çalışan uygulamanın okuduğu bundle bozulmaz
+    tmp_path = os.path.join(os.path.dirname(os.path.abspath(out)), f".{os.path.basename(out)}.tmp")
+    try:
+        joblib.dump(bundle, tmp_path)
+        os.replace(tmp_path, out)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"reference_profile eklendi ({len(numeric)} sayısal, {len(categorical)} kategorik) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
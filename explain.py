@@ -0,0 +1,205 @@
+# explain.py
+# Özellik katkıları (harmanlanmış RF + CatBoost tahmini için).
+#   CatBoost: yerel ShapValues.
+#   RF: shap.TreeExplainer (TreeSHAP) -> desteklenen yol.
+#       Saabas ağaç yolu katkıları sadece açıkça istenirse (allow_saabas) ve etiketli;
+#       SHAP değildir (tutarsız, bölme sırasına bağlı).
+# Dönüştürülmüş kolonlar (one-hot vb.) girdi kolonlarına toplanır; eşlenemeyen kolon
+# varsa hata verilir (katkılar sessizce sıfırlanmaz).
+# Satır bazlı LRU önbellek (ExplanationCache + explain_batch): sadece önbellekte
+# olmayan satırlar hesaplanır.
+# Streamlit'e bağımlı değil: app.py önbelleği sarar, testler doğrudan çağırır.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import shap
+except ImportError:
+    shap = None
+
+METHOD_TREESHAP = "TreeSHAP"
+METHOD_SAABAS = "Saabas (yaklaşık, SHAP değil)"
+
+
+def rf_method(allow_saabas: bool = False):
+    # Bu ortamda RF için hangi yöntem kullanılacak? (None = açıklama yok)
+    if shap is not None:
+        return METHOD_TREESHAP
+    return METHOD_SAABAS if allow_saabas else None
+
+
+def split_pipeline(pipe):
+    # (önişleme, son model); önişleme yoksa None
+    steps = getattr(pipe, "steps", None)
+    if steps and len(steps) > 1:
+        return pipe[:-1], steps[-1][1]
+    if steps:
+        return None, steps[-1][1]
+    return None, pipe
+
+
+def transformed_feature_names(pre, est, X: pd.DataFrame):
+    if pre is not None:
+        try:
+            return [str(c) for c in pre.get_feature_names_out()]
+        except Exception:
+            return None
+    names = getattr(est, "feature_names_in_", None)
+    if names is None:
+        names = getattr(est, "feature_names_", None)
+    return [str(c) for c in names] if names is not None else list(X.columns)
+
+
+def input_column_matrix(out_names, input_cols) -> np.ndarray:
+    # out_names[j] hangi girdi kolonundan geliyor? -> (n_out × n_in) 0/1 matris
+    # "cat__station_name_AKSARAY" -> station_name (ön ek atılır, en uzun eşleşen kolon)
+    M = np.zeros((len(out_names), len(input_cols)))
+    pos = {c: i for i, c in enumerate(input_cols)}
+    by_len = sorted(input_cols, key=len, reverse=True)
+    unmapped = []
+    for j, name in enumerate(out_names):
+        cands = [name] + ([name.split("__", 1)[1]] if "__" in name else [])
+        hit = next((c for c in cands if c in pos), None)
+        if hit is None:
+            hit = next((c for cand in cands for c in by_len if cand.startswith(c + "_")), None)
+        if hit is None:
+            unmapped.append(name)
+        else:
+            M[j, pos[hit]] = 1.0
+    if unmapped:
+        raise ValueError(f"Girdi kolonuna eşlenemeyen dönüştürülmüş kolonlar: {unmapped[:10]}")
+    return M
+
+
+def forest_path_matrix(forest, n_features: int):
+    # Saabas için tüm ağaçların (toplam düğüm × özellik) seyrek matrisi:
+    # düğüme inmek = değer(düğüm) - değer(ebeveyn), ebeveynin bölme özelliğine yazılır
+    from scipy import sparse
+
+    rows, cols, vals, bias = [], [], [], 0.0
+    offset = 0
+    for tree in forest.estimators_:
+        t = tree.tree_
+        value = t.value[:, 0, 0]
+        parents = np.where(t.children_left >= 0)[0]
+        for kids in (t.children_left[parents], t.children_right[parents]):
+            rows.append(kids + offset)
+            cols.append(t.feature[parents])
+            vals.append(value[kids] - value[parents])
+        bias += value[0]
+        offset += t.node_count
+    n_trees = len(forest.estimators_)
+    M = sparse.csr_matrix(
+        (np.concatenate(vals) / n_trees, (np.concatenate(rows), np.concatenate(cols))),
+        shape=(offset, n_features),
+    )
+    return M, bias / n_trees
+
+
+def rf_contributions(est, Xt, method: str, explainer=None, path_matrix=None):
+    # -> (base [n], katkılar [n × n_out]) dönüştürülmüş özellik uzayında
+    if method == METHOD_TREESHAP:
+        Xd = Xt.toarray() if hasattr(Xt, "toarray") else np.asarray(Xt, dtype=float)
+        explainer = explainer or shap.TreeExplainer(est)
+        base = float(np.ravel(explainer.expected_value)[0])
+        return np.full(Xd.shape[0], base), np.asarray(explainer.shap_values(Xd))
+
+    if method == METHOD_SAABAS:
+        M, bias = path_matrix or forest_path_matrix(est, est.n_features_in_)
+        indicator, _ = est.decision_path(Xt)
+        contrib = indicator @ M
+        contrib = contrib.toarray() if hasattr(contrib, "toarray") else np.asarray(contrib)
+        return np.full(contrib.shape[0], bias), contrib
+
+    raise RuntimeError("RF açıklaması için `shap` kurulu olmalı (requirements.txt).")
+
+
+def cat_contributions(est, Xt):
+    from catboost import Pool
+
+    names = getattr(est, "feature_names_", None)
+    if isinstance(Xt, pd.DataFrame) and names:
+        Xt = Xt[list(names)]
+    sv = est.get_feature_importance(Pool(Xt, cat_features=est.get_cat_feature_indices()), type="ShapValues")
+    sv = np.asarray(sv)
+    return sv[:, -1], sv[:, :-1]
+
+
+def to_input_space(pre, est, X_model: pd.DataFrame, contrib: np.ndarray) -> np.ndarray:
+    names = transformed_feature_names(pre, est, X_model)
+    if names is None or len(names) != contrib.shape[1]:
+        raise ValueError(
+            f"Dönüştürülmüş kolon adları alınamadı ({contrib.shape[1]} kolon); "
+            "katkılar girdi kolonlarına eşlenemiyor."
+        )
+    return contrib @ input_column_matrix(names, list(X_model.columns))
+
+
+def explain_blend(rf_pipe, cat_pipe, alpha: float, X_model: pd.DataFrame, method: str,
+                  explainer=None, path_matrix=None):
+    # -> (base [n], katkılar [n × girdi kolonları]); base + katkı toplamı = harmanlanmış tahmin
+    pre, est = split_pipeline(rf_pipe)
+    Xt = pre.transform(X_model) if pre is not None else X_model
+    rf_base, rf_c = rf_contributions(est, Xt, method, explainer=explainer, path_matrix=path_matrix)
+    rf_in = to_input_space(pre, est, X_model, rf_c)
+
+    pre, est = split_pipeline(cat_pipe)
+    Xt = pre.transform(X_model) if pre is not None else X_model
+    cat_base, cat_c = cat_contributions(est, Xt)
+    cat_in = to_input_space(pre, est, X_model, cat_c)
+
+    base = alpha * rf_base + (1 - alpha) * cat_base
+    contrib = alpha * rf_in + (1 - alpha) * cat_in
+    return base, contrib
+
+
+class ExplanationCache:
+    def __init__(self, max_rows: int):
+        self.max_rows = max_rows
+        self.rows = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get_many(self, keys):
+        with self.lock:
+            hits = {}
+            for k in keys:
+                v = self.rows.get(k)
+                if v is not None:
+                    self.rows.move_to_end(k)
+                    hits[k] = v
+            return hits
+
+    def put_many(self, items):
+        with self.lock:
+            for k, v in items:
+                self.rows[k] = v
+                self.rows.move_to_end(k)
+            while len(self.rows) > self.max_rows:
+                self.rows.popitem(last=False)
+
+
+def explain_batch(X_model: pd.DataFrame, cache: ExplanationCache, key_prefix: tuple, compute_fn):
+    # Toplu açıklama: önbellekte olmayan satırlar tek compute_fn çağrısında hesaplanır.
+    # key_prefix: (bundle sürümü, yöntem) gibi; anahtar = key_prefix + (satır hash'i,)
+    # compute_fn(X) -> (base [n], katkılar [n × kolon]), ör. explain_blend'i saran fonksiyon
+    # -> (base Series, katkı DataFrame); index X_model ile aynı
+    row_hash = pd.util.hash_pandas_object(X_model, index=False).to_numpy()
+    keys = [(*key_prefix, int(h)) for h in row_hash]
+
+    hits = cache.get_many(keys)
+    miss = [i for i, k in enumerate(keys) if k not in hits]
+    if miss:
+        base_m, contrib_m = compute_fn(X_model.iloc[miss])
+        new = [(keys[i], (base_m[j], contrib_m[j])) for j, i in enumerate(miss)]
+        cache.put_many(new)
+        hits.update(new)
+
+    base = np.array([hits[k][0] for k in keys], dtype=float)
+    contrib = np.vstack([hits[k][1] for k in keys]) if keys else np.zeros((0, X_model.shape[1]))
+    return (
+        pd.Series(base, index=X_model.index, name="base"),
+        pd.DataFrame(contrib, index=X_model.index, columns=X_model.columns),
+    )
@@ -0,0 +1,125 @@
+# history_store.py
+# Geçmiş yolcu verisi: bellekte yoğun (istasyon × gün) matris.
+# Nokta sorgusu O(1) dizi indeksleme, aralık taraması dilim; gecikme / kayan ortalama
+# önceden hesaplanmış kümülatif toplamlardan vektörel çıkar.
+# İstasyon / tarih kodları benzersiz değerler için bir kez çözülür (station_codes /
+# day_codes), satırlara index dizileriyle dağıtılır.
+# Streamlit'e bağımlı değil: app.py dışında import edilip test edilebilir.
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAGS = (1, 7)
+DEFAULT_ROLL = 7
+
+
+def history_feature_names(lags=DEFAULT_LAGS, roll: int = DEFAULT_ROLL) -> list[str]:
+    return [f"passage_cnt_lag{k}" for k in lags] + [f"passage_cnt_roll{roll}_mean"]
+
+
+class HistoryStore:
+    def __init__(self, df: pd.DataFrame, station_key=str, lags=DEFAULT_LAGS, roll: int = DEFAULT_ROLL):
+        # df: en az station_name, date, passage_cnt
+        # station_key: istasyon adı -> kimlik (app.py'de slugify_tr; yazım farkları birleşir)
+        self.station_key = station_key
+        self.lags = tuple(lags)
+        self.roll = int(roll)
+
+        keys = df["station_name"].astype(str).map(station_key)
+        s_codes, s_uniq = pd.factorize(keys)
+        self.station_index = {k: i for i, k in enumerate(s_uniq)}
+
+        days = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[D]")
+        self.day0 = days.min()
+        d_codes = (days - self.day0).astype(np.int64)
+        self.n_days = int(d_codes.max()) + 1
+
+        # eksik gün = NaN. Aynı (istasyon, gün) birden çok kayıtta (ör. iki yazımı
+        # station_key ile birleşen istasyon) değerler toplanır ve uyarı loglanır.
+        vals = df["passage_cnt"].to_numpy(dtype=float)
+        has = ~np.isnan(vals)
+        shape = (len(s_uniq), self.n_days)
+        total = np.zeros(shape)
+        count = np.zeros(shape, dtype=np.int64)
+        np.add.at(total, (s_codes[has], d_codes[has]), vals[has])
+        np.add.at(count, (s_codes[has], d_codes[has]), 1)
+        self.values = np.where(count > 0, total, np.nan)
+
+        dup_s, dup_d = np.nonzero(count > 1)
+        self.duplicate_keys = pd.DataFrame({
+            "station_key": s_uniq[dup_s],
+            "date": (self.day0 + dup_d.astype("timedelta64[D]")).astype("datetime64[ns]"),
+            "n_rows": count[dup_s, dup_d],
+        })
+        if len(self.duplicate_keys):
+            logger.warning(
+                "Geçmiş veride %d (istasyon, gün) anahtarı birden çok kayıtta; değerler toplandı. "
+                "İlk anahtarlar: %s",
+                len(self.duplicate_keys),
+                self.duplicate_keys.head(5).to_dict("records"),
+            )
+
+        # kayan ortalama için NaN'sız kümülatif toplam / sayım (başa 0 kolonu)
+        filled = np.nan_to_num(self.values, nan=0.0)
+        zero = np.zeros((len(s_uniq), 1))
+        self._csum = np.hstack([zero, np.cumsum(filled, axis=1)])
+        self._ccnt = np.hstack([zero, np.cumsum(~np.isnan(self.values), axis=1)])
+
+    @property
+    def feature_names(self) -> list[str]:
+        return history_feature_names(self.lags, self.roll)
+
+    # ---- kod çözümü (benzersiz değerler için çağır) ----
+    def station_codes(self, station_names) -> np.ndarray:
+        # bilinmeyen istasyon -> -1
+        return np.array(
+            [self.station_index.get(self.station_key(str(x)), -1) for x in station_names],
+            dtype=np.int64,
+        )
+
+    def day_codes(self, dates) -> np.ndarray:
+        days = pd.to_datetime(pd.Series(list(dates), dtype=object)).to_numpy().astype("datetime64[D]")
+        return (days - self.day0).astype(np.int64)
+
+    # ---- kodlarla vektörel sorgular ----
+    def take(self, s: np.ndarray, t: np.ndarray) -> np.ndarray:
+        # (s[i], t[i]) hücreleri; aralık dışı / bilinmeyen -> NaN
+        ok = (s >= 0) & (t >= 0) & (t < self.n_days)
+        out = np.full(len(s), np.nan)
+        out[ok] = self.values[s[ok], t[ok]]
+        return out
+
+    def lag_features(self, s: np.ndarray, t: np.ndarray) -> dict:
+        # Gecikmeler ve önceki `roll` günün ortalaması (hedef gün hariç, eksik günler atlanır)
+        feats = {f"passage_cnt_lag{k}": self.take(s, t - k) for k in self.lags}
+
+        ok = s >= 0
+        hi = np.clip(t, 0, self.n_days)
+        lo = np.clip(t - self.roll, 0, self.n_days)
+        sc = np.where(ok, s, 0)
+        tot = self._csum[sc, hi] - self._csum[sc, lo]
+        cnt = self._ccnt[sc, hi] - self._ccnt[sc, lo]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            roll = np.where(ok & (cnt > 0), tot / cnt, np.nan)
+        feats[f"passage_cnt_roll{self.roll}_mean"] = roll
+        return feats
+
+    # ---- isimle kolaylık sorguları ----
+    def lookup(self, station_names, dates) -> np.ndarray:
+        # (istasyon[i], tarih[i]) için passage_cnt; yoksa NaN
+        s_idx, s_uniq = pd.factorize(pd.Series(list(station_names), dtype=object))
+        d_idx, d_uniq = pd.factorize(pd.Series(list(dates), dtype=object))
+        return self.take(self.station_codes(s_uniq)[s_idx], self.day_codes(d_uniq)[d_idx])
+
+    def range_scan(self, station_name: str, start, end) -> pd.Series:
+        # [start, end] aralığı (iki uç dahil), eksik günler NaN
+        idx = pd.date_range(start, end, freq="D")
+        s = self.station_index.get(self.station_key(str(station_name)))
+        if s is None or not len(idx):
+            return pd.Series(np.nan, index=idx, name="passage_cnt")
+        t0 = int(self.day_codes([idx[0]])[0])
+        t = np.arange(t0, t0 + len(idx))
+        return pd.Series(self.take(np.full(len(t), s), t), index=idx, name="passage_cnt")
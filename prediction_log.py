@@ -0,0 +1,142 @@
+# prediction_log.py
+# Kolonlu tahmin logu: istek yolu sadece kuyruğa koyar; yazıcı thread satırları
+# biriktirip <root>/log_date=YYYY-MM-DD/part-*.parquet dosyalarına toplu yazar.
+# Kuyruk doluysa kayıt düşürülür (tahmin asla beklemez), sayaçlarda görünür.
+# Streamlit'e bağımlı değil: log'u okumak için app.py'yi çalıştırmak gerekmez.
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionLogWriter:
+    def __init__(self, root: str, queue_max: int, flush_rows: int, flush_sec: float):
+        self.root = root
+        self.flush_rows = flush_rows
+        self.flush_sec = flush_sec
+        self.q = queue.Queue(maxsize=queue_max)
+        self.n_written = 0
+        self.n_dropped = 0
+        self.n_errors = 0
+        self._seq = 0
+        self._pending_rows = 0  # thread tamponunda, henüz yazılmamış satırlar
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def submit(self, df: pd.DataFrame):
+        try:
+            self.q.put_nowait(df)
+        except queue.Full:
+            with self._lock:
+                self.n_dropped += len(df)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "written": self.n_written,
+                "dropped": self.n_dropped,
+                "errors": self.n_errors,
+                "queued": self.q.qsize(),
+            }
+
+    def close(self, timeout: float = 5.0):
+        # None -> thread kalanları yazıp çıkar. Kuyruk doluysa bekleyen batch'ler
+        # düşürülmüş sayılıp boşaltılır; thread zamanında bitmezse tampondakiler de.
+        try:
+            self.q.put(None, timeout=1.0)
+        except queue.Full:
+            self._drain_as_dropped()
+            self.q.put(None)
+        self._thread.join(timeout=timeout)
+        if self._thread.is_alive():
+            self._drain_as_dropped()
+            with self._lock:
+                self.n_dropped += self._pending_rows
+                self._pending_rows = 0
+
+    def _drain_as_dropped(self):
+        while True:
+            try:
+                item = self.q.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None and item is not False:
+                with self._lock:
+                    self.n_dropped += len(item)
+
+    def _run(self):
+        buf, n_buf = [], 0
+        last_flush = time.monotonic()
+        while True:
+            wait = max(0.0, last_flush + self.flush_sec - time.monotonic())
+            try:
+                item = self.q.get(timeout=wait)
+            except queue.Empty:
+                item = False  # zaman aşımı: sadece süre kontrolü
+
+            stop = item is None
+            if item is not None and item is not False:
+                buf.append(item)
+                n_buf += len(item)
+                with self._lock:
+                    self._pending_rows = n_buf
+
+            due = n_buf >= self.flush_rows or time.monotonic() - last_flush >= self.flush_sec
+            if buf and (due or stop):
+                self._flush(buf)
+                buf, n_buf = [], 0
+                with self._lock:
+                    self._pending_rows = 0
+            if due or not buf:
+                last_flush = time.monotonic()
+            if stop:
+                return
+
+    def _flush(self, buf):
+        df = pd.concat(buf, ignore_index=True)
+        # bölüm tarihi satırın kendi logged_at'inden (gece yarısı civarı doğru güne düşer)
+        if "logged_at" in df.columns:
+            log_dates = pd.to_datetime(df["logged_at"]).dt.strftime("%Y-%m-%d")
+        else:
+            log_dates = pd.Series(datetime.now().strftime("%Y-%m-%d"), index=df.index)
+        for log_date, part in df.groupby(log_dates, sort=True):
+            self._write_part(log_date, part.reset_index(drop=True))
+
+    def _write_part(self, log_date: str, df: pd.DataFrame):
+        tmp_path = None
+        try:
+            part_dir = os.path.join(self.root, f"log_date={log_date}")
+            os.makedirs(part_dir, exist_ok=True)
+            self._seq += 1
+            fname = f"part-{datetime.now():%H%M%S}-{os.getpid()}-{self._seq:06d}.parquet"
+            # önce gizli geçici dosyaya yaz, sonra atomik taşı: okuyucu yarım dosya görmez
+            # ("." ile başlayan dosyaları pyarrow dataset taraması atlar)
+            tmp_path = os.path.join(part_dir, f".{fname}.tmp")
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, os.path.join(part_dir, fname))
+            with self._lock:
+                self.n_written += len(df)
+        except Exception:
+            logger.exception("Tahmin logu yazılamadı; %d satır kaybedildi", len(df))
+            with self._lock:
+                self.n_errors += 1
+                self.n_dropped += len(df)
+            if tmp_path is not None and os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+
+def read_prediction_log(root: str) -> pd.DataFrame:
+    # Tüm log'u tek seferde tara (log_date kolonu klasör adından gelir)
+    return pd.read_parquet(root)
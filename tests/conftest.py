@@ -0,0 +1,5 @@
+import os
+import sys
+
+# app.py yanındaki modüller (aggregate, history_store, ...) kök dizinde
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
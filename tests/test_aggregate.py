@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from aggregate import aggregate_by_district
+
+
+def test_matches_groupby_sum():
+    rng = np.random.default_rng(0)
+    n = 500
+    keys = pd.DataFrame({
+        "district_norm": rng.choice(["fatih", "kadikoy", "sisli", "uskudar"], size=n),
+        "date": rng.choice(["2024-12-01", "2024-12-02", "2024-12-03"], size=n),
+    })
+    y = rng.uniform(0, 1000, size=n)
+
+    table = aggregate_by_district(keys, y)
+    expected = (
+        keys.assign(y=y)
+        .groupby(["district_norm", "date"])["y"].sum()
+        .unstack(fill_value=0.0)
+    )
+    pd.testing.assert_frame_equal(table, expected, check_names=False)
+
+
+def test_missing_cells_are_zero():
+    keys = pd.DataFrame({
+        "district_norm": ["fatih", "kadikoy"],
+        "date": ["2024-12-01", "2024-12-02"],
+    })
+    table = aggregate_by_district(keys, np.array([5.0, 7.0]))
+
+    assert table.loc["fatih", "2024-12-02"] == 0.0
+    assert table.loc["kadikoy", "2024-12-01"] == 0.0
+    assert table.to_numpy().sum() == 12.0
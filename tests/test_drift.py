@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift import DRIFT_PSI_WARN, DriftMonitor, build_reference_profile, psi
+
+
+def test_psi_identical_is_zero():
+    counts = [10, 40, 30, 20]
+    assert psi(counts, counts) == pytest.approx(0.0, abs=1e-12)
+    # sadece ölçek farkı (aynı dağılım) -> 0
+    assert psi(counts, [c * 7 for c in counts]) == pytest.approx(0.0, abs=1e-12)
+
+
+def test_psi_grows_with_shift():
+    ref = [25, 25, 25, 25]
+    small = psi(ref, [20, 25, 25, 30])
+    large = psi(ref, [5, 10, 25, 60])
+    assert 0.0 < small < DRIFT_PSI_WARN < large
+
+
+def test_psi_handles_empty_bins():
+    # referansta boş kova -> eps ile sonlu kalır
+    assert np.isfinite(psi([0, 50, 50], [10, 45, 45]))
+
+
+def make_reference(n=5000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "tmax_c": rng.normal(20, 5, size=n),
+        "station_name": rng.choice(["A", "B", "C"], size=n),
+    })
+
+
+def test_monitor_same_distribution_stays_low():
+    ref = make_reference()
+    mon = DriftMonitor(build_reference_profile(ref, ["tmax_c"], ["station_name"]), min_rows=100)
+    live = make_reference(seed=1)
+    # parça parça gözlem = tek seferde gözlem
+    for i in range(0, len(live), 500):
+        mon.observe(live.iloc[i:i + 500])
+
+    m = mon.metrics()
+    assert m["n_rows"] == len(live)
+    assert m["tmax_c"] < DRIFT_WARN
+    assert m["station_name"] < DRIFT_WARN
+
+
+def test_monitor_detects_shift_and_unseen_categories():
+    ref = make_reference()
+    mon = DriftMonitor(build_reference_profile(ref, ["tmax_c"], ["station_name"]), min_rows=100)
+    live = pd.DataFrame({"tmax_c": np.full(500, 35.0), "station_name": ["Z"] * 500})
+    mon.observe(live)
+
+    m = mon.metrics()
+    assert m["tmax_c"] > 0.25
+    assert m["station_name"] > 0.25
+
+
+def test_monitor_withholds_scores_below_min_rows():
+    ref = make_reference()
+    mon = DriftMonitor(build_reference_profile(ref, ["tmax_c"], ["station_name"]), min_rows=100)
+    mon.observe(ref.iloc[:10])
+    m = mon.metrics()
+    assert m["tmax_c"] is None and m["station_name"] is None
+
+    mon.reset()
+    assert mon.metrics()["n_rows"] == 0
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("catboost")
+
+from catboost import CatBoostRegressor  # noqa: E402
+from sklearn.compose import ColumnTransformer  # noqa: E402
+from sklearn.ensemble import RandomForestRegressor  # noqa: E402
+from sklearn.pipeline import Pipeline  # noqa: E402
+from sklearn.preprocessing import OneHotEncoder  # noqa: E402
+
+import explain  # noqa: E402
+
+ALPHA = 0.7
+
+
+@pytest.fixture(scope="module")
+def models():
+    rng = np.random.default_rng(0)
+    n = 300
+    X = pd.DataFrame({
+        "station_name": rng.choice(["A", "B", "C"], size=n),
+        "tmax_c": rng.uniform(0, 35, size=n),
+        "rain_mm": rng.exponential(3.0, size=n),
+    })
+    y = (X["station_name"].map({"A": 1000, "B": 3000, "C": 500}) + 20 * X["tmax_c"] - 50 * X["rain_mm"]).to_numpy()
+
+    rf_pipe = Pipeline([
+        ("pre", ColumnTransformer([
+            ("cat", OneHotEncoder(handle_unknown="ignore", sparse_output=False), ["station_name"]),
+            ("num", "passthrough", ["tmax_c", "rain_mm"]),
+        ])),
+        ("rf", RandomForestRegressor(n_estimators=20, max_depth=6, random_state=0)),
+    ]).fit(X, y)
+    cat_pipe = CatBoostRegressor(iterations=50, depth=4, verbose=0, random_seed=0, cat_features=["station_name"]).fit(X, y)
+    return rf_pipe, cat_pipe, X.iloc[:40].reset_index(drop=True)
+
+
+def blended(rf_pipe, cat_pipe, X):
+    return ALPHA * rf_pipe.predict(X) + (1 - ALPHA) * cat_pipe.predict(X)
+
+
+@pytest.mark.parametrize("method", [explain.METHOD_TREESHAP, explain.METHOD_SAABAS])
+def test_base_plus_contributions_reconstructs_prediction(models, method):
+    if method == explain.METHOD_TREESHAP and explain.shap is None:
+        pytest.skip("shap kurulu değil")
+    rf_pipe, cat_pipe, X = models
+
+    base, contrib = explain.explain_blend(rf_pipe, cat_pipe, ALPHA, X, method)
+
+    assert contrib.shape == X.shape
+    np.testing.assert_allclose(base + contrib.sum(axis=1), blended(rf_pipe, cat_pipe, X), rtol=1e-4, atol=1e-3)
+    # one-hot kolonları station_name'e toplanır: istasyon katkısı sıfır değil
+    assert np.abs(contrib[:, 0]).sum() > 0
+
+
+def test_unmapped_columns_raise():
+    with pytest.raises(ValueError):
+        explain.input_column_matrix(["f0", "f1"], ["station_name", "tmax_c"])
+
+
+def test_onehot_names_map_to_input_columns():
+    M = explain.input_column_matrix(
+        ["cat__station_name_AKSARAY", "cat__station_name_Kadıköy (Batı)", "num__tmax_c", "tmean_c"],
+        ["station_name", "tmax_c", "tmean_c"],
+    )
+    np.testing.assert_array_equal(M.argmax(axis=1), [0, 0, 1, 2])
+
+
+def test_missing_method_raises(models):
+    rf_pipe, cat_pipe, X = models
+    with pytest.raises(RuntimeError):
+        explain.explain_blend(rf_pipe, cat_pipe, ALPHA, X, None)
+
+
+def counting_compute(rf_pipe, cat_pipe, method):
+    calls = []
+
+    def compute(X):
+        calls.append(len(X))
+        return explain.explain_blend(rf_pipe, cat_pipe, ALPHA, X, method)
+
+    return compute, calls
+
+
+def test_cached_batch_computes_only_missed_rows(models):
+    method = explain.rf_method(allow_saabas=True)
+    rf_pipe, cat_pipe, X = models
+    compute, calls = counting_compute(rf_pipe, cat_pipe, method)
+    cache = explain.ExplanationCache(max_rows=1_000)
+
+    explain.explain_batch(X.iloc[:20], cache, ("v1", method), compute)
+    base, contrib = explain.explain_batch(X.iloc[10:30], cache, ("v1", method), compute)
+
+    # ikinci çağrıda 10..19 önbellekten, sadece 20..29 hesaplanır
+    assert calls == [20, 10]
+    assert list(base.index) == list(X.index[10:30])
+    assert list(contrib.columns) == list(X.columns)
+
+    # farklı anahtar öneki (ör. yeni bundle) önbelleği paylaşmaz
+    explain.explain_batch(X.iloc[:5], cache, ("v2", method), compute)
+    assert calls == [20, 10, 5]
+
+
+def test_cached_batch_reconstructs_prediction(models):
+    method = explain.rf_method(allow_saabas=True)
+    rf_pipe, cat_pipe, X = models
+    compute, _ = counting_compute(rf_pipe, cat_pipe, method)
+    cache = explain.ExplanationCache(max_rows=1_000)
+
+    explain.explain_batch(X.iloc[::2], cache, ("v1", method), compute)
+    base, contrib = explain.explain_batch(X, cache, ("v1", method), compute)  # yarısı önbellekten
+
+    np.testing.assert_allclose(base + contrib.sum(axis=1), blended(rf_pipe, cat_pipe, X), rtol=1e-4, atol=1e-3)
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from history_store import HistoryStore
+
+
+@pytest.fixture
+def store():
+    # A: 2024-01-01..2024-01-10 (1..10), 01-05 eksik; B: sadece 2024-01-03 = 100
+    days = pd.date_range("2024-01-01", "2024-01-10", freq="D")
+    a = pd.DataFrame({"station_name": "A", "date": days, "passage_cnt": np.arange(1.0, 11.0)})
+    a = a[a["date"] != "2024-01-05"]
+    b = pd.DataFrame({"station_name": ["B"], "date": ["2024-01-03"], "passage_cnt": [100.0]})
+    return HistoryStore(pd.concat([a, b], ignore_index=True), station_key=str.lower)
+
+
+def test_point_lookup(store):
+    got = store.lookup(
+        ["A", "a", "B", "A", "A", "A", "C"],
+        ["2024-01-01", "2024-01-10", "2024-01-03", "2024-01-05", "2023-12-31", "2024-01-11", "2024-01-01"],
+    )
+    # station_key birleştirir; eksik gün, geçmiş öncesi/sonrası ve bilinmeyen istasyon NaN
+    np.testing.assert_array_equal(got[:3], [1.0, 10.0, 100.0])
+    assert np.isnan(got[3:]).all()
+
+
+def test_range_scan_clips_to_history(store):
+    s = store.range_scan("A", "2023-12-30", "2024-01-02")
+    assert list(s.index.strftime("%Y-%m-%d")) == ["2023-12-30", "2023-12-31", "2024-01-01", "2024-01-02"]
+    assert np.isnan(s.iloc[:2]).all()
+    assert list(s.iloc[2:]) == [1.0, 2.0]
+
+    assert store.range_scan("B", "2024-01-09", "2024-01-12").isna().all()
+    assert store.range_scan("C", "2024-01-01", "2024-01-02").isna().all()
+
+
+def test_lag_and_roll_at_edges(store):
+    s = store.station_codes(["A"])[[0, 0, 0, 0, 0]]
+    t = store.day_codes(["2024-01-01", "2024-01-02", "2024-01-06", "2024-01-10", "2024-01-12"])
+    f = store.lag_features(s, t)
+
+    lag1 = f["passage_cnt_lag1"]
+    assert np.isnan(lag1[0])            # ilk günün öncesi yok
+    assert lag1[1] == 1.0
+    assert np.isnan(lag1[2])            # 01-05 eksik
+    assert lag1[3] == 9.0
+    assert np.isnan(lag1[4])            # 01-11 geçmişte yok
+
+    lag7 = f["passage_cnt_lag7"]
+    assert np.isnan(lag7[:3]).all()
+    assert lag7[3] == 3.0
+
+    roll = f["passage_cnt_roll7_mean"]
+    assert np.isnan(roll[0])                       # pencere boş
+    assert roll[1] == 1.0                          # kısmi pencere: sadece 01-01
+    assert roll[2] == pytest.approx((1 + 2 + 3 + 4) / 4)   # 01-05 atlanır
+    assert roll[3] == pytest.approx((3 + 4 + 6 + 7 + 8 + 9) / 6)
+    assert roll[4] == pytest.approx((6 + 7 + 8 + 9 + 10) / 5)  # pencere geçmişin sonunu aşar
+
+
+def test_unknown_station_has_no_features(store):
+    s = store.station_codes(["C"])
+    t = store.day_codes(["2024-01-05"])
+    f = store.lag_features(s, t)
+    assert all(np.isnan(v).all() for v in f.values())
+
+
+def test_merged_spellings_on_same_day_are_summed(caplog):
+    df = pd.DataFrame({
+        "station_name": ["Taksim", "TAKSIM", "Taksim", "Şişli"],
+        "date": ["2024-01-01", "2024-01-01", "2024-01-02", "2024-01-01"],
+        "passage_cnt": [100.0, 50.0, 70.0, 30.0],
+    })
+    with caplog.at_level("WARNING", logger="history_store"):
+        hs = HistoryStore(df, station_key=str.lower)
+
+    got = hs.lookup(["Taksim", "taksim", "Şişli"], ["2024-01-01", "2024-01-02", "2024-01-01"])
+    np.testing.assert_array_equal(got, [150.0, 70.0, 30.0])
+
+    assert hs.duplicate_keys.to_dict("records") == [
+        {"station_key": "taksim", "date": pd.Timestamp("2024-01-01"), "n_rows": 2}
+    ]
+    assert "taksim" in caplog.text
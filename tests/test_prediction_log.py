@@ -0,0 +1,62 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+from prediction_log import PredictionLogWriter, read_prediction_log
+
+pytest.importorskip("pyarrow")
+
+
+def test_close_flushes_readable_parts(tmp_path):
+    w = PredictionLogWriter(str(tmp_path), queue_max=16, flush_rows=10_000, flush_sec=60.0)
+    w.submit(pd.DataFrame({"y": [1.0, 2.0]}))
+    w.submit(pd.DataFrame({"y": [3.0]}))
+    w.close()
+
+    assert w.stats()["written"] == 3
+    assert w.stats()["errors"] == 0
+    df = read_prediction_log(str(tmp_path))
+    assert sorted(df["y"]) == [1.0, 2.0, 3.0]
+
+    files = [f for _, _, fs in os.walk(tmp_path) for f in fs]
+    assert files and all(f.startswith("part-") and f.endswith(".parquet") for f in files)
+
+
+def test_full_queue_counts_dropped_rows(tmp_path):
+    w = PredictionLogWriter(str(tmp_path), queue_max=1, flush_rows=10_000, flush_sec=60.0)
+    # yazıcı thread kuyruğu boşaltmadan önce çok sayıda batch gönder
+    for _ in range(200):
+        w.submit(pd.DataFrame({"y": [0.0]}))
+    w.close()
+
+    s = w.stats()
+    assert s["written"] + s["dropped"] == 200
+
+
+def test_partition_follows_logged_at(tmp_path):
+    w = PredictionLogWriter(str(tmp_path), queue_max=16, flush_rows=10_000, flush_sec=60.0)
+    w.submit(pd.DataFrame({
+        "logged_at": pd.to_datetime(["2024-03-01 23:59:59", "2024-03-02 00:00:01"]),
+        "y": [1.0, 2.0],
+    }))
+    w.close()
+
+    assert sorted(os.listdir(tmp_path)) == ["log_date=2024-03-01", "log_date=2024-03-02"]
+    assert w.stats()["written"] == 2
+
+
+def test_close_counts_unflushed_rows_when_writer_stuck(tmp_path):
+    w = PredictionLogWriter(str(tmp_path), queue_max=4, flush_rows=1, flush_sec=60.0)
+    release = threading.Event()
+    w._write_part = lambda log_date, df: release.wait()  # yazıcı ilk flush'ta takılı kalır
+
+    for _ in range(6):
+        w.submit(pd.DataFrame({"y": [0.0]}))
+    w.close(timeout=0.2)
+
+    s = w.stats()
+    release.set()
+    assert s["written"] == 0
+    assert s["dropped"] == 6